@@ -2,11 +2,44 @@
 Application factory for LSparrow - Statistical Analysis Application.
 """
 
-from flask import Flask, jsonify, render_template, request
+from types import SimpleNamespace
+
+import orjson
+from flask import Flask, render_template
+from flask_orjson import OrjsonProvider
 
 from app.config import Config
 
 
+class JSONProvider(OrjsonProvider):
+    """
+    orjson-backed JSON provider.
+
+    Also serializes the numpy scalars produced by the statistics service
+    and non-string dict keys (e.g. numeric group values) without
+    converting them first.
+    """
+
+    option = (
+        OrjsonProvider.option | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    )
+
+    # Same knobs as Flask's DefaultJSONProvider. Output is single-line and
+    # keeps insertion order unless explicitly changed, even in debug mode.
+    compact = True
+    sort_keys = False
+
+    def dumps(self, obj, *, option=None, **kwargs):
+        """Serialize data as JSON, honouring ``compact`` and ``sort_keys``."""
+        if option is None:
+            option = self.option
+            if not self.compact:
+                option |= orjson.OPT_INDENT_2
+            if self.sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+        return super().dumps(obj, option=option, **kwargs)
+
+
 def create_app(config_class=Config):
     """
     Application factory function.
@@ -18,14 +51,26 @@ def create_app(config_class=Config):
         Configured Flask application instance.
     """
     app = Flask(__name__)
+    app.json = JSONProvider(app)
     app.config.from_object(config_class)
 
+    if not app.config.get("SECRET_KEY"):
+        raise ValueError("SECRET_KEY environment variable must be set in production")
+
+    # Snapshot of the Gemini settings read by the request handlers
+    app.extensions["gemini_cfg"] = SimpleNamespace(
+        enabled=app.config.get("GEMINI_AI_ENABLED", False),
+        api_key=app.config.get("GEMINI_API_KEY", ""),
+        model=app.config.get("GEMINI_MODEL", ""),
+        fallback_models=tuple(app.config.get("GEMINI_FALLBACK_MODELS", [])),
+    )
+
     # Register blueprints
     from app.main import bp as main_bp
 
     app.register_blueprint(main_bp)
 
-    from app.errors import bp as errors_bp
+    from app.errors import bp as errors_bp, json_error_response, wants_json_response
 
     app.register_blueprint(errors_bp)
 
@@ -35,13 +80,8 @@ def create_app(config_class=Config):
     @app.errorhandler(AppException)
     def handle_app_exception(error):
         """Handle custom application exceptions."""
-        if (
-            request.accept_mimetypes["application/json"]
-            >= request.accept_mimetypes["text/html"]
-        ):
-            response = jsonify(error.to_dict())
-            response.status_code = error.status_code
-            return response
+        if wants_json_response():
+            return json_error_response(error.json_body, error.status_code)
         return render_template("errors/500.html", error=error), error.status_code
 
     return app
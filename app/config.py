@@ -37,15 +37,9 @@ class ProductionConfig(Config):
 
     DEBUG = False
 
-    # In production, ensure SECRET_KEY is set via environment variable
-    @property
-    def SECRET_KEY(self):
-        key = os.environ.get("SECRET_KEY")
-        if not key:
-            raise ValueError(
-                "SECRET_KEY environment variable must be set in production"
-            )
-        return key
+    # In production, SECRET_KEY must be set via environment variable
+    # (checked in create_app)
+    SECRET_KEY = os.environ.get("SECRET_KEY")
 
 
 class TestingConfig(Config):
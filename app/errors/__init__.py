@@ -1,71 +1,77 @@
 """
 Errors blueprint initialization and error handlers.
 """
-from flask import Blueprint, render_template, request, jsonify
+import orjson
+from flask import Blueprint, Response, current_app, g, render_template, request
 from werkzeug.exceptions import HTTPException
 
 bp = Blueprint('errors', __name__)
 
+# Handled status codes: code -> (error name, message)
+_ERRORS = {
+    400: ('Bad Request', 'Invalid request'),
+    403: ('Forbidden', 'You do not have permission to access this resource'),
+    404: ('Not Found', 'The requested resource was not found'),
+    413: ('File Too Large', 'The uploaded file exceeds the maximum allowed size'),
+    500: ('Internal Server Error', 'An unexpected error occurred'),
+}
+
+# Pre-serialized JSON bodies and template names per status code
+_JSON = {
+    code: orjson.dumps({'error': name, 'message': message})
+    for code, (name, message) in _ERRORS.items()
+}
+_TEMPLATES = {code: f'errors/{code}.html' for code in _ERRORS}
+
 
 def wants_json_response():
-    """Check if the client prefers JSON response over HTML."""
-    return request.accept_mimetypes['application/json'] >= \
-           request.accept_mimetypes['text/html']
+    """
+    Check if the client prefers JSON response over HTML.
+    The decision is cached on `g` for the rest of the request.
+    """
+    if '_wants_json' not in g:
+        best = request.accept_mimetypes.best_match(
+            ['application/json', 'text/html'], default='application/json'
+        )
+        g._wants_json = best == 'application/json'
+    return g._wants_json
 
 
-@bp.app_errorhandler(400)
-def bad_request_error(error):
-    """Handle 400 Bad Request errors."""
-    if wants_json_response():
-        return jsonify({
-            'error': 'Bad Request',
-            'message': str(error.description) if hasattr(error, 'description') else 'Invalid request'
-        }), 400
-    return render_template('errors/400.html', error=error), 400
+def json_error_response(body, status):
+    """Build a JSON error response from an already serialized body."""
+    return Response(body, status=status, mimetype='application/json')
 
 
-@bp.app_errorhandler(403)
-def forbidden_error(error):
-    """Handle 403 Forbidden errors."""
+def _error_response(code, error):
+    """Build the JSON or HTML response for a handled status code."""
     if wants_json_response():
-        return jsonify({
-            'error': 'Forbidden',
-            'message': 'You do not have permission to access this resource'
-        }), 403
-    return render_template('errors/403.html', error=error), 403
+        return json_error_response(_JSON[code], code)
+    return render_template(_TEMPLATES[code], error=error), code
 
 
-@bp.app_errorhandler(404)
-def not_found_error(error):
-    """Handle 404 Not Found errors."""
-    if wants_json_response():
-        return jsonify({
-            'error': 'Not Found',
-            'message': 'The requested resource was not found'
-        }), 404
-    return render_template('errors/404.html', error=error), 404
+def _make_error_handler(code):
+    """Create an error handler for a status code with a constant message."""
+    def handler(error):
+        return _error_response(code, error)
 
+    handler.__name__ = f'handle_{code}'
+    handler.__doc__ = f'Handle {code} {_ERRORS[code][0]} errors.'
+    return handler
 
-@bp.app_errorhandler(413)
-def request_entity_too_large(error):
-    """Handle 413 Request Entity Too Large errors (file upload too big)."""
-    if wants_json_response():
-        return jsonify({
-            'error': 'File Too Large',
-            'message': 'The uploaded file exceeds the maximum allowed size'
-        }), 413
-    return render_template('errors/413.html', error=error), 413
 
+for _code in (403, 404, 413, 500):
+    bp.app_errorhandler(_code)(_make_error_handler(_code))
 
-@bp.app_errorhandler(500)
-def internal_error(error):
-    """Handle 500 Internal Server errors."""
+
+@bp.app_errorhandler(400)
+def bad_request_error(error):
+    """Handle 400 Bad Request errors, echoing the error description."""
     if wants_json_response():
-        return jsonify({
-            'error': 'Internal Server Error',
-            'message': 'An unexpected error occurred'
-        }), 500
-    return render_template('errors/500.html', error=error), 500
+        message = str(error.description) if hasattr(error, 'description') else _ERRORS[400][1]
+        return json_error_response(
+            orjson.dumps({'error': _ERRORS[400][0], 'message': message}), 400
+        )
+    return render_template(_TEMPLATES[400], error=error), 400
 
 
 @bp.app_errorhandler(Exception)
@@ -78,14 +84,6 @@ def handle_exception(error):
     if isinstance(error, HTTPException):
         return error
     
-    # Log the error (in production, you'd want proper logging)
-    import traceback
-    traceback.print_exc()
-    
-    if wants_json_response():
-        return jsonify({
-            'error': 'Internal Server Error',
-            'message': 'An unexpected error occurred'
-        }), 500
+    current_app.logger.exception('Unhandled exception')
     
-    return render_template('errors/500.html', error=error), 500
+    return _error_response(500, error)
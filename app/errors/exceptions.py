@@ -1,6 +1,11 @@
 """
 Custom exception classes for the application.
 """
+from functools import cached_property
+
+import orjson
+
+from app import JSONProvider
 
 
 class AppException(Exception):
@@ -12,6 +17,13 @@ class AppException(Exception):
         self.status_code = status_code
         self.payload = payload
     
+    @cached_property
+    def json_body(self):
+        """to_dict() as JSON bytes, serialized on first use like app.json does."""
+        return orjson.dumps(
+            self.to_dict(), option=JSONProvider.option, default=JSONProvider.default
+        )
+    
     def to_dict(self):
         rv = dict(self.payload or ())
         rv['error'] = self.__class__.__name__
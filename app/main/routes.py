@@ -4,10 +4,13 @@ Main blueprint route handlers.
 
 from flask import render_template, request, current_app, jsonify, Response, url_for
 from datetime import datetime
+from functools import lru_cache
+from xml.etree import ElementTree
+
+import orjson
 
 from app.main import bp
-from app.services.csv_processor import CSVProcessor
-from app.services.gemini_ai import GeminiAIService
+from app.errors import json_error_response
 from app.errors.exceptions import (
     AppException,
     ValidationError,
@@ -15,6 +18,39 @@ from app.errors.exceptions import (
     UnsupportedEncodingError,
 )
 
+# User-facing error messages
+_ERR_NO_FILE = "Datoteka nije učitana"
+_ERR_NO_NAME = "Datoteka nije odabrana"
+_ERR_NOT_CSV = "Molimo učitajte CSV datoteku"
+_ERR_NO_LIKERT = "Nisu pronađena pitanja s Likertovom skalom (1-5) u CSV datoteci"
+_ERR_UNEXPECTED = "Došlo je do neočekivane greške prilikom obrade datoteke"
+_ERR_DETECT_FAILED = "Došlo je do neočekivane greške prilikom analize datoteke"
+_ERR_AI_DISABLED = "AI analiza nije omogućena."
+_ERR_AI_NO_DATA = "Nema podataka za analizu. Molimo prvo učitajte CSV datoteku."
+_ERR_AI_FAILED = "Došlo je do pogreške s AI analizom. Molimo pokušajte kasnije."
+
+# Pre-serialized {"error": message} bodies for the JSON API
+_JSON_ERRORS = {
+    message: orjson.dumps({"error": message})
+    for message in (
+        _ERR_NO_FILE,
+        _ERR_NO_NAME,
+        _ERR_NOT_CSV,
+        _ERR_DETECT_FAILED,
+        _ERR_AI_DISABLED,
+        _ERR_AI_NO_DATA,
+        _ERR_AI_FAILED,
+    )
+}
+
+
+def _json_error(message, status):
+    """Build a JSON error response, reusing a pre-serialized body if possible."""
+    body = _JSON_ERRORS.get(message)
+    if body is None:
+        body = orjson.dumps({"error": message})
+    return json_error_response(body, status)
+
 
 @bp.route("/")
 def index():
@@ -28,46 +64,96 @@ def index():
 @bp.route("/robots.txt")
 def robots_txt():
     """Serve robots.txt for search engine crawlers."""
-    # SEO: Allow all user agents, reference sitemap location
-    sitemap_url = url_for("main.sitemap_xml", _external=True)
-    content = "User-agent: *\n" "Allow: /\n" f"\nSitemap: {sitemap_url}\n"
-    return Response(content, mimetype="text/plain")
+    body = _render_robots_txt(request.url_root)
+    return _cacheable_response(body, mimetype="text/plain")
 
 
 @bp.route("/sitemap.xml")
 def sitemap_xml():
-    """Generate and serve a valid XML sitemap for all public routes."""
-    # SEO: Include all publicly accessible pages
-    pages = []
-    # Static public routes with their change frequency and priority
-    routes_config = [
-        {"endpoint": "main.index", "changefreq": "weekly", "priority": "1.0"},
-        {"endpoint": "main.analysis", "changefreq": "monthly", "priority": "0.8"},
-    ]
+    """Serve a valid XML sitemap for all public routes."""
     lastmod = datetime.now().strftime("%Y-%m-%d")
+    body = _render_sitemap_xml(request.url_root, lastmod)
+    return _cacheable_response(body, mimetype="application/xml")
+
+
+# How long crawlers and reverse proxies may cache the SEO files (1 day)
+_SEO_MAX_AGE = 24 * 60 * 60
 
-    for route in routes_config:
-        pages.append(
-            {
-                "loc": url_for(route["endpoint"], _external=True),
-                "lastmod": lastmod,
-                "changefreq": route["changefreq"],
-                "priority": route["priority"],
-            }
-        )
 
-    xml = '<?xml version="1.0" encoding="UTF-8"?>\n'
-    xml += '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
-    for page in pages:
-        xml += "  <url>\n"
-        xml += f"    <loc>{page['loc']}</loc>\n"
-        xml += f"    <lastmod>{page['lastmod']}</lastmod>\n"
-        xml += f"    <changefreq>{page['changefreq']}</changefreq>\n"
-        xml += f"    <priority>{page['priority']}</priority>\n"
-        xml += "  </url>\n"
-    xml += "</urlset>\n"
+def _cacheable_response(body, mimetype):
+    """
+    Build a publicly cacheable response with an ETag, so repeat crawler
+    hits can be answered by a proxy or with a 304 Not Modified.
+    """
+    response = Response(body, mimetype=mimetype)
+    response.cache_control.public = True
+    response.cache_control.max_age = _SEO_MAX_AGE
+    response.add_etag()
+    return response.make_conditional(request)
+
+
+_SITEMAP_NAMESPACE = "http://www.sitemaps.org/schemas/sitemap/0.9"
+
+# SEO: Static public routes as (endpoint, changefreq, priority)
+_SITEMAP_ROUTES = (
+    ("main.index", "weekly", "1.0"),
+    ("main.analysis", "monthly", "0.8"),
+)
+
+
+# Bodies are cached per host (url_for is host-dependent); the sitemap is
+# also keyed by lastmod so it is rebuilt once a day. url_for therefore
+# only runs on a cache miss.
+@lru_cache(maxsize=16)
+def _render_robots_txt(url_root):
+    """Build the robots.txt body for the current host."""
+    # SEO: Allow all user agents, reference sitemap location
+    sitemap_url = url_for("main.sitemap_xml", _external=True)
+    content = "User-agent: *\n" "Allow: /\n" f"\nSitemap: {sitemap_url}\n"
+    return content.encode("utf-8")
 
-    return Response(xml, mimetype="application/xml")
+
+@lru_cache(maxsize=16)
+def _render_sitemap_xml(url_root, lastmod):
+    """Build the sitemap.xml body for the current host."""
+    urlset = ElementTree.Element("urlset", xmlns=_SITEMAP_NAMESPACE)
+    for endpoint, changefreq, priority in _SITEMAP_ROUTES:
+        url = ElementTree.SubElement(urlset, "url")
+        ElementTree.SubElement(url, "loc").text = url_for(endpoint, _external=True)
+        ElementTree.SubElement(url, "lastmod").text = lastmod
+        ElementTree.SubElement(url, "changefreq").text = changefreq
+        ElementTree.SubElement(url, "priority").text = priority
+
+    return ElementTree.tostring(urlset, encoding="UTF-8", xml_declaration=True)
+
+
+_CSV_EXTS = (".csv",)
+
+
+def _is_csv(filename):
+    """Check if a filename has a CSV extension (case-insensitive)."""
+    return filename.lower().endswith(_CSV_EXTS)
+
+
+def _get_csv_file():
+    """
+    Get the uploaded CSV file from the current request.
+
+    Returns:
+        Tuple of (file, None) if a CSV file was uploaded,
+        otherwise (None, error message).
+    """
+    file = request.files.get("csv_file")
+    if file is None:
+        return None, _ERR_NO_FILE
+
+    filename = file.filename
+    if not filename:
+        return None, _ERR_NO_NAME
+    if not _is_csv(filename):
+        return None, _ERR_NOT_CSV
+
+    return file, None
 
 
 @bp.route("/analysis", methods=["GET", "POST"])
@@ -82,41 +168,33 @@ def analysis():
     error = None
 
     if request.method == "POST":
-        if "csv_file" not in request.files:
-            error = "Datoteka nije učitana"
-        else:
-            file = request.files["csv_file"]
-            if file.filename == "":
-                error = "Datoteka nije odabrana"
-            elif not file.filename.endswith(".csv"):
-                error = "Molimo učitajte CSV datoteku"
-            else:
-                try:
-                    selected_groups = request.form.getlist("selected_groups")
-                    selected_questions = request.form.getlist("selected_questions")
-                    processor = CSVProcessor()
-                    results = processor.process(
-                        file, selected_groups, selected_questions
-                    )
-
-                    if not results["overall"]:
-                        error = "Nisu pronađena pitanja s Likertovom skalom (1-5) u CSV datoteci"
-                        results = None
-                except UnsupportedEncodingError as e:
-                    error = str(e.message)
-                except AppException as e:
-                    error = str(e.message)
-                except Exception as e:
-                    current_app.logger.error(
-                        f"Unexpected error processing file: {str(e)}"
-                    )
-                    error = "Došlo je do neočekivane greške prilikom obrade datoteke"
+        file, error = _get_csv_file()
+        if file is not None:
+            # Imported lazily: pulls in pandas/scipy, which most routes don't need
+            from app.services.csv_processor import CSVProcessor
+
+            try:
+                selected_groups = request.form.getlist("selected_groups")
+                selected_questions = request.form.getlist("selected_questions")
+                processor = CSVProcessor()
+                results = processor.process(file, selected_groups, selected_questions)
+
+                if not results["overall"]:
+                    error = _ERR_NO_LIKERT
+                    results = None
+            except UnsupportedEncodingError as e:
+                error = str(e.message)
+            except AppException as e:
+                error = str(e.message)
+            except Exception as e:
+                current_app.logger.error(f"Unexpected error processing file: {str(e)}")
+                error = _ERR_UNEXPECTED
 
     return render_template(
         "analysis.html",
         results=results,
         error=error,
-        ai_enabled=current_app.config.get("GEMINI_AI_ENABLED", False),
+        ai_enabled=current_app.extensions["gemini_cfg"].enabled,
     )
 
 
@@ -127,29 +205,35 @@ def detect_columns():
 
     Returns JSON list of column names suitable for grouping.
     """
-    if "csv_file" not in request.files:
-        return jsonify({"error": "Datoteka nije učitana"}), 400
+    file, error = _get_csv_file()
+    if file is None:
+        return _json_error(error, 400)
 
-    file = request.files["csv_file"]
-    if file.filename == "" or not file.filename.endswith(".csv"):
-        return jsonify({"error": "Molimo učitajte CSV datoteku"}), 400
+    from app.services.csv_processor import CSVProcessor
 
     try:
         processor = CSVProcessor()
         result = processor.detect_columns(file)
         return jsonify(result)
     except UnsupportedEncodingError as e:
-        return jsonify({"error": str(e.message)}), 400
+        return _json_error(str(e.message), 400)
     except AppException as e:
-        return jsonify({"error": str(e.message)}), 400
+        return _json_error(str(e.message), 400)
     except Exception as e:
         current_app.logger.error(f"Error detecting columns: {str(e)}")
-        return (
-            jsonify(
-                {"error": "Došlo je do neočekivane greške prilikom analize datoteke"}
-            ),
-            500,
-        )
+        return _json_error(_ERR_DETECT_FAILED, 500)
+
+
+@lru_cache(maxsize=4)
+def _get_ai_service(api_key, model, fallback_models):
+    """
+    Get a process-wide GeminiAIService for the given settings, so its
+    HTTP client and connection pool are reused across requests.
+    """
+    # Imported lazily: pulls in the google-genai SDK
+    from app.services.gemini_ai import GeminiAIService
+
+    return GeminiAIService(api_key, model=model, fallback_models=fallback_models)
 
 
 @bp.route("/api/ai-analysis", methods=["POST"])
@@ -160,28 +244,20 @@ def ai_analysis():
     Reads previously stored results from the session and sends them
     to the Gemini AI service.
     """
-    ai_enabled = current_app.config.get("GEMINI_AI_ENABLED", False)
-    api_key = current_app.config.get("GEMINI_API_KEY", "")
+    gemini_cfg = current_app.extensions["gemini_cfg"]
 
-    if not ai_enabled or not api_key:
-        return jsonify({"error": "AI analiza nije omogućena."}), 400
+    if not gemini_cfg.enabled or not gemini_cfg.api_key:
+        return _json_error(_ERR_AI_DISABLED, 400)
 
-    data = request.get_json()
+    # Decoded by the app's orjson provider; malformed bodies fall through
+    # to the "no data" response below.
+    data = request.get_json(silent=True, cache=False)
     if not data or not data.get("overall"):
-        return (
-            jsonify(
-                {
-                    "error": "Nema podataka za analizu. Molimo prvo učitajte CSV datoteku."
-                }
-            ),
-            400,
-        )
+        return _json_error(_ERR_AI_NO_DATA, 400)
 
     try:
-        model = current_app.config.get("GEMINI_MODEL", "")
-        fallback_models = current_app.config.get("GEMINI_FALLBACK_MODELS", [])
-        ai_service = GeminiAIService(
-            api_key, model=model, fallback_models=fallback_models
+        ai_service = _get_ai_service(
+            gemini_cfg.api_key, gemini_cfg.model, gemini_cfg.fallback_models
         )
         interpretation = ai_service.interpret_results(
             overall_stats=data["overall"],
@@ -191,14 +267,7 @@ def ai_analysis():
         return jsonify({"interpretation": interpretation})
     except Exception as e:
         current_app.logger.error(f"Gemini AI error: {str(e)}")
-        return (
-            jsonify(
-                {
-                    "error": "Došlo je do pogreške s AI analizom. Molimo pokušajte kasnije."
-                }
-            ),
-            500,
-        )
+        return _json_error(_ERR_AI_FAILED, 500)
 
 
 # --- Privacy Policy Page ---
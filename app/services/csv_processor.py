@@ -2,20 +2,53 @@
 CSV file processing service.
 """
 
-from typing import Any, BinaryIO, Dict, List, Tuple, Optional
-
+import codecs
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from typing import Any, BinaryIO, Dict, List, NamedTuple, Tuple, Optional
+
+import charset_normalizer
+import numpy as np
 import pandas as pd
 
 from app.services.statistics import StatisticsCalculator
 from app.errors.exceptions import UnsupportedEncodingError, NoLikertDataError
 
 
+class ParsedCSV(NamedTuple):
+    """A parsed upload together with its detected Likert columns."""
+
+    df: pd.DataFrame
+    responses: np.ndarray  # Likert columns coerced to numbers, (rows, columns)
+    likert_columns: List[str]
+
+
 class CSVProcessor:
     """
     Processor for CSV files containing survey data.
     """
 
-    SUPPORTED_ENCODINGS = ["utf-8", "utf-8-sig", "latin-1", "cp1250", "cp1252"]
+    # Single-byte encodings considered when a file is not valid UTF-8
+    LEGACY_ENCODINGS = ["cp1250", "cp1252", "latin-1"]
+    # Number of leading bytes inspected for encoding detection
+    ENCODING_SAMPLE_SIZE = 64 * 1024
+    BYTE_ORDER_MARKS = [
+        (codecs.BOM_UTF8, "utf-8-sig"),
+        (codecs.BOM_UTF16_LE, "utf-16"),
+        (codecs.BOM_UTF16_BE, "utf-16"),
+    ]
+
+    # Rows scanned at a time by the column checks that can stop early
+    SCAN_CHUNK_SIZE = 64 * 1024
+
+    # Recently parsed uploads keyed by content hash. The same file is sent
+    # twice (column detection, then processing), so the second request
+    # skips parsing and Likert detection. Entries must not be mutated.
+    PARSE_CACHE_SIZE = 4
+    _parse_cache: "OrderedDict[bytes, ParsedCSV]" = OrderedDict()
+    _parse_cache_lock = threading.Lock()
 
     def __init__(self):
         """Initialize the CSV processor."""
@@ -28,12 +61,11 @@ class CSVProcessor:
         Returns:
             Dictionary with 'groupable' and 'questions' lists.
         """
-        df = self._read_csv(file_content)
+        df, _, likert_columns = self._load(file_content)
 
         if len(df) <= 1:
             return {"groupable": [], "questions": []}
 
-        likert_columns = self._find_likert_columns(df)
         likert_set = set(likert_columns)
 
         groupable = []
@@ -67,13 +99,32 @@ class CSVProcessor:
         Check if a column contains multi-select values (separated by ";").
 
         A column is considered multi-select if more than `threshold` fraction
-        of its non-null values contain a semicolon.
+        of its non-null values contain a semicolon. Only text columns can
+        qualify; rows are scanned in chunks, stopping as soon as the
+        remaining rows can no longer change the answer.
         """
-        non_null = series.dropna().astype(str)
-        if len(non_null) == 0:
+        dtypes = pd.api.types
+        if not (dtypes.is_object_dtype(series) or dtypes.is_string_dtype(series)):
             return False
-        contains_semicolon = non_null.str.contains(";", na=False).sum()
-        return (contains_semicolon / len(non_null)) > threshold
+
+        non_null = series.dropna()
+        n = len(non_null)
+        if n == 0:
+            return False
+        if not isinstance(non_null.dtype, pd.StringDtype):
+            non_null = non_null.astype(str)
+
+        hits = 0
+        for start in range(0, n, self.SCAN_CHUNK_SIZE):
+            chunk = non_null.iloc[start : start + self.SCAN_CHUNK_SIZE]
+            # Plain substring search, which Arrow-backed strings run in C
+            hits += int(chunk.str.contains(";", regex=False).sum())
+            if hits / n > threshold:
+                return True
+            remaining = n - start - len(chunk)
+            if (hits + remaining) / n <= threshold:
+                return False
+        return False
 
     def _is_unique_per_row(self, series: pd.Series, threshold: float = 0.9) -> bool:
         """
@@ -81,13 +132,44 @@ class CSVProcessor:
         indicating it is an ID-like column (timestamps, emails, etc.).
 
         Returns True if the ratio of unique values to total non-null values
-        is >= `threshold`.
+        is >= `threshold`. Long low-cardinality columns are scanned in chunks,
+        stopping as soon as the remaining rows can no longer change the answer.
         """
         non_null = series.dropna()
-        if len(non_null) == 0:
+        n = len(non_null)
+        if n == 0:
+            return True
+
+        chunk_size = self.SCAN_CHUNK_SIZE
+        if n <= chunk_size:
+            return non_null.nunique() / n >= threshold
+
+        # Decide from the first chunk's distinct values where possible; the
+        # set is only built once a second chunk has to be merged in
+        first = non_null.iloc[:chunk_size].unique()
+        if len(first) / n >= threshold:
             return True
-        n_unique = non_null.nunique()
-        return (n_unique / len(non_null)) >= threshold
+        if (len(first) + n - chunk_size) / n < threshold:
+            return False
+        if len(first) >= chunk_size:
+            # High-cardinality column: one full nunique() is cheaper than
+            # a set of every value
+            return non_null.nunique() / n >= threshold
+
+        seen = set(first)
+        for start in range(chunk_size, n, chunk_size):
+            if len(seen) >= chunk_size:
+                # High-cardinality column: one full nunique() is cheaper
+                # than growing the set
+                break
+            chunk = non_null.iloc[start : start + chunk_size]
+            seen.update(chunk.unique())
+            if len(seen) / n >= threshold:
+                return True
+            remaining = n - start - len(chunk)
+            if (len(seen) + remaining) / n < threshold:
+                return False
+        return non_null.nunique() / n >= threshold
 
     def process(
         self,
@@ -108,21 +190,21 @@ class CSVProcessor:
         Returns:
             Dictionary containing overall statistics, grouped statistics, and grouping info.
         """
-        df = self._read_csv(file_content)
-        likert_columns = self._find_likert_columns(df)
+        df, responses, likert_columns = self._load(file_content)
 
         if selected_questions:
             # Only keep questions that are both selected and actually Likert
-            likert_set = set(likert_columns)
-            likert_columns = [q for q in selected_questions if q in likert_set]
+            positions = {column: i for i, column in enumerate(likert_columns)}
+            likert_columns = [q for q in selected_questions if q in positions]
+            responses = responses[:, [positions[q] for q in likert_columns]]
 
-        overall_results = self._calculate_overall_statistics(df, likert_columns)
+        overall_results = self._calculate_overall_statistics(responses, likert_columns)
         (
             grouped_results,
             available_groupings,
             distribution_results,
         ) = self._calculate_grouped_statistics(
-            df, likert_columns, selected_grouping_columns or []
+            df, responses, likert_columns, selected_grouping_columns or []
         )
 
         return {
@@ -132,63 +214,181 @@ class CSVProcessor:
             "distributions": distribution_results,
         }
 
-    def _read_csv(self, file_content: BinaryIO) -> pd.DataFrame:
+    def _load(self, file_content: BinaryIO) -> ParsedCSV:
         """
-        Read CSV file with automatic encoding detection.
+        Parse an upload and detect its Likert columns, reusing a cached
+        result when the same file content was parsed recently.
 
         Args:
             file_content: File-like object containing CSV data.
 
+        Returns:
+            ParsedCSV with the DataFrame, its numeric Likert responses and column names.
+        """
+        # Buffer the upload once; hashing and parsing all work on these bytes
+        file_content.seek(0)
+        raw = file_content.read()
+        key = hashlib.blake2b(raw, digest_size=16).digest()
+
+        with self._parse_cache_lock:
+            parsed = self._parse_cache.get(key)
+            if parsed is not None:
+                self._parse_cache.move_to_end(key)
+                return parsed
+
+        df = self._read_csv(raw)
+        # Coerce every candidate column once; Likert detection and all
+        # statistics reuse the result
+        numeric_df = df.select_dtypes(
+            exclude=["bool", "datetime", "datetimetz", "timedelta"]
+        ).apply(pd.to_numeric, errors="coerce")
+        likert_columns = self._find_likert_columns(numeric_df)
+        responses = numeric_df[likert_columns].to_numpy(dtype=np.float64)
+        parsed = ParsedCSV(df, responses, likert_columns)
+
+        with self._parse_cache_lock:
+            self._parse_cache[key] = parsed
+            while len(self._parse_cache) > self.PARSE_CACHE_SIZE:
+                self._parse_cache.popitem(last=False)
+
+        return parsed
+
+    def _read_csv(self, raw: bytes) -> pd.DataFrame:
+        """
+        Read CSV file with automatic encoding detection.
+
+        The encoding is detected from a sample of the file, so the CSV is
+        normally parsed only once.
+
+        Args:
+            raw: Bytes of the CSV file.
+
         Returns:
             Pandas DataFrame with the CSV data.
 
         Raises:
             UnsupportedEncodingError: If the file cannot be read with any supported encoding.
         """
-        for encoding in self.SUPPORTED_ENCODINGS:
+        encoding = self._detect_encoding(raw[: self.ENCODING_SAMPLE_SIZE])
+
+        # Detection only sees a sample; latin-1 can decode any byte sequence
+        candidates = [encoding] if encoding == "latin-1" else [encoding, "latin-1"]
+        for encoding in candidates:
             try:
-                file_content.seek(0)
-                return pd.read_csv(file_content, encoding=encoding)
-            except Exception:
+                return self._parse_csv(raw, encoding)
+            except UnicodeDecodeError:
                 continue
+            except Exception:
+                break
 
         raise UnsupportedEncodingError()
 
-    def _find_likert_columns(self, df: pd.DataFrame) -> List[str]:
+    def _parse_csv(self, raw: bytes, encoding: str) -> pd.DataFrame:
+        """
+        Parse CSV data with the multi-threaded Arrow reader, falling back to
+        pandas' C parser whenever Arrow fails or its result could differ.
+
+        Args:
+            raw: Bytes of the CSV file.
+            encoding: Encoding to decode the file with.
+
+        Returns:
+            Pandas DataFrame with the CSV data.
+        """
+        try:
+            df = pd.read_csv(io.BytesIO(raw), encoding=encoding, engine="pyarrow")
+            if self._is_plain_frame(df):
+                return df
+        except Exception:
+            pass
+
+        return pd.read_csv(io.BytesIO(raw), encoding=encoding)
+
+    @staticmethod
+    def _is_plain_frame(df: pd.DataFrame) -> bool:
+        """
+        Check that a frame read by Arrow matches what the C parser produces:
+        unique column names and only numeric, boolean or text columns.
+
+        Arrow keeps duplicate headers (the C parser renames them "x.1"),
+        infers dates and timestamps, and reads undecodable text as bytes.
+        """
+        if df.columns.has_duplicates:
+            return False
+        return all(
+            isinstance(dtype, pd.StringDtype) or dtype.kind in "biuf"
+            for dtype in df.dtypes
+        )
+
+    def _detect_encoding(self, sample: bytes) -> str:
+        """
+        Detect the encoding of a CSV file from its leading bytes.
+
+        Checks for a byte order mark first, then for valid UTF-8, and only
+        then asks charset_normalizer to pick one of LEGACY_ENCODINGS.
+
+        Args:
+            sample: Leading bytes of the file.
+
+        Returns:
+            Name of the detected encoding.
+        """
+        for bom, encoding in self.BYTE_ORDER_MARKS:
+            if sample.startswith(bom):
+                return encoding
+
+        try:
+            # Incremental decoder tolerates a multi-byte character cut at the end
+            codecs.getincrementaldecoder("utf-8")().decode(sample)
+            return "utf-8"
+        except UnicodeDecodeError:
+            pass
+
+        match = charset_normalizer.from_bytes(
+            sample, cp_isolation=self.LEGACY_ENCODINGS
+        ).best()
+        return match.encoding if match else "latin-1"
+
+    def _find_likert_columns(self, numeric_df: pd.DataFrame) -> List[str]:
         """
         Find columns containing Likert scale (1-5) data.
 
+        A column is Likert data when it has at least one numeric value, at
+        most 5 distinct values, and all of them between 1 and 5. The rule
+        is evaluated for all columns at once with frame-level reductions.
+
         Args:
-            df: DataFrame to analyze.
+            numeric_df: DataFrame with the candidate columns coerced to numbers.
 
         Returns:
             List of column names containing Likert scale data.
         """
-        return [
-            column
-            for column in df.columns
-            if self.stats_calculator.is_likert_column(df[column])
-        ]
+        n_unique = numeric_df.nunique(dropna=True)
+        mask = (
+            (n_unique > 0)
+            & (n_unique <= 5)
+            & (numeric_df.min() >= 1)
+            & (numeric_df.max() <= 5)
+        )
+        return mask.index[mask].tolist()
 
     def _calculate_overall_statistics(
-        self, df: pd.DataFrame, likert_columns: List[str]
+        self, responses: np.ndarray, likert_columns: List[str]
     ) -> List[Dict]:
         """
         Calculate statistics for all respondents.
 
         Args:
-            df: DataFrame with survey data.
+            responses: Numeric Likert responses, one column per question.
             likert_columns: List of columns to analyze.
 
         Returns:
             List of dictionaries containing statistics for each question.
         """
         results = []
+        column_stats = self.stats_calculator.calculate_columns(responses)
 
-        for column in likert_columns:
-            numeric_col = pd.to_numeric(df[column], errors="coerce")
-            stats_data = self.stats_calculator.calculate(numeric_col)
-
+        for column, stats_data in zip(likert_columns, column_stats):
             if stats_data:
                 results.append({"question": column, **stats_data})
 
@@ -197,6 +397,7 @@ class CSVProcessor:
     def _calculate_grouped_statistics(
         self,
         df: pd.DataFrame,
+        responses: np.ndarray,
         likert_columns: List[str],
         selected_columns: List[str],
     ) -> Tuple[Dict, Dict, Dict]:
@@ -205,6 +406,7 @@ class CSVProcessor:
 
         Args:
             df: DataFrame with survey data.
+            responses: Numeric Likert responses, one column per question.
             likert_columns: List of columns to analyze.
             selected_columns: List of column names to group by.
 
@@ -219,9 +421,11 @@ class CSVProcessor:
             if col_name not in df.columns:
                 continue
 
-            unique_values = df[col_name].dropna().unique().tolist()
+            # Codes number the values in order of first appearance; -1 is missing
+            codes, uniques = pd.factorize(df[col_name], sort=False)
+            values = uniques.tolist()
 
-            if not unique_values:
+            if not values:
                 continue
 
             group_key = f"group_{idx}"
@@ -229,33 +433,44 @@ class CSVProcessor:
             available_groupings[group_key] = {
                 "label": col_name,
                 "column": col_name,
-                "values": sorted(unique_values, key=str),
+                "values": sorted(values, key=str),
             }
 
+            # Split the response rows by group with one stable sort of the
+            # codes instead of one boolean mask per group value
+            order = np.argsort(codes, kind="stable")
+            sizes = np.bincount(codes[codes >= 0], minlength=len(values))
+            group_rows = np.split(
+                order[len(codes) - sizes.sum() :], np.cumsum(sizes)[:-1]
+            )
+
+            group_stats = []
+            for value, rows in zip(values, group_rows):
+                group_responses = responses[rows]
+                column_stats = self.stats_calculator.calculate_columns(group_responses)
+                group_stats.append((value, group_responses, column_stats))
+
             grouped_results[group_key] = self._calculate_group_statistics(
-                df, col_name, unique_values, likert_columns
+                group_stats, likert_columns
             )
 
             distribution_results[group_key] = self._calculate_distribution_statistics(
-                df, col_name, unique_values, likert_columns
+                group_stats, likert_columns
             )
 
         return grouped_results, available_groupings, distribution_results
 
     def _calculate_distribution_statistics(
         self,
-        df: pd.DataFrame,
-        group_col: str,
-        unique_values: list,
+        group_stats: List[Tuple[Any, np.ndarray, List[Optional[Dict]]]],
         likert_columns: List[str],
     ) -> Dict:
         """
         Calculate Likert distribution statistics (Agreement/Neutral/Disagreement).
 
         Args:
-            df: DataFrame with survey data.
-            group_col: Column name to group by.
-            unique_values: List of unique values in the group column.
+            group_stats: List of (group value, Likert responses of that group,
+                statistics of each of its columns).
             likert_columns: List of columns to analyze.
 
         Returns:
@@ -263,28 +478,21 @@ class CSVProcessor:
         """
         distribution_results = {}
 
-        for value in unique_values:
-            group_df = df[df[group_col] == value]
+        for value, group_responses, column_stats in group_stats:
             group_dist = []
 
-            for column in likert_columns:
-                # Get valid responses 1-5
-                numeric_col = pd.to_numeric(group_df[column], errors="coerce")
-                valid_data = numeric_col[
-                    (numeric_col >= 1) & (numeric_col <= 5)
-                ].dropna()
-
-                n = len(valid_data)
-                if n == 0:
+            for column, numeric_col, stats_data in zip(
+                likert_columns, group_responses.T, column_stats
+            ):
+                # No valid responses 1-5
+                if not stats_data:
                     continue
 
-                dis = len(valid_data[(valid_data >= 1) & (valid_data <= 2)])
-                neu = len(valid_data[valid_data == 3])
-                agr = len(valid_data[(valid_data >= 4) & (valid_data <= 5)])
-
-                # Get mean from calculator
-                stats_data = self.stats_calculator.calculate(numeric_col)
-                mean = stats_data["AS"] if stats_data else "-"
+                n = stats_data["N"]
+                dis = int(((numeric_col >= 1) & (numeric_col <= 2)).sum())
+                neu = int((numeric_col == 3).sum())
+                agr = int(((numeric_col >= 4) & (numeric_col <= 5)).sum())
+                mean = stats_data["AS"]
 
                 group_dist.append(
                     {
@@ -307,18 +515,15 @@ class CSVProcessor:
 
     def _calculate_group_statistics(
         self,
-        df: pd.DataFrame,
-        group_col: str,
-        unique_values: list,
+        group_stats: List[Tuple[Any, np.ndarray, List[Optional[Dict]]]],
         likert_columns: List[str],
     ) -> Dict:
         """
-        Calculate statistics for each group value.
+        Collect the statistics of each group value.
 
         Args:
-            df: DataFrame with survey data.
-            group_col: Column name to group by.
-            unique_values: List of unique values in the group column.
+            group_stats: List of (group value, Likert responses of that group,
+                statistics of each of its columns).
             likert_columns: List of columns to analyze.
 
         Returns:
@@ -326,18 +531,14 @@ class CSVProcessor:
         """
         group_results = {}
 
-        for value in unique_values:
-            group_df = df[df[group_col] == value]
-            group_stats = []
-
-            for column in likert_columns:
-                numeric_col = pd.to_numeric(group_df[column], errors="coerce")
-                stats_data = self.stats_calculator.calculate(numeric_col)
+        for value, _, column_stats in group_stats:
+            question_stats = []
 
+            for column, stats_data in zip(likert_columns, column_stats):
                 if stats_data:
-                    group_stats.append({"question": column, **stats_data})
+                    question_stats.append({"question": column, **stats_data})
 
-            if group_stats:
-                group_results[value] = group_stats
+            if question_stats:
+                group_results[value] = question_stats
 
         return group_results
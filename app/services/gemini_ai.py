@@ -2,11 +2,21 @@
 Gemini AI service for interpreting statistical results.
 """
 
-import json
+from functools import lru_cache
 from typing import Any, Dict, List, Optional
 
-from google import genai
-from google.genai import types
+import orjson
+
+
+@lru_cache(maxsize=4)
+def _get_client(api_key: str):
+    """
+    Get a process-wide Gemini client for the API key, so its HTTP
+    connection pool is shared by every service using that key.
+    """
+    from google import genai
+
+    return genai.Client(api_key=api_key)
 
 
 class GeminiAIService:
@@ -28,7 +38,7 @@ class GeminiAIService:
             model: Gemini model name. Falls back to DEFAULT_MODEL if empty.
             fallback_models: Optional list of fallback models for rate-limit retries.
         """
-        self.client = genai.Client(api_key=api_key)
+        self.client = _get_client(api_key)
         self.model = model or self.DEFAULT_MODEL
         self.fallback_models = (
             fallback_models
@@ -38,6 +48,32 @@ class GeminiAIService:
 
     DEFAULT_FALLBACK_MODELS = ["gemini-2.5-flash", "gemini-2.5-flash-lite"]
 
+    # Static parts of the prompt around the serialized statistics
+    _PROMPT_PREFIX = (
+        "You are a statistics expert. A user conducted a Likert-scale (1-5) survey. "
+        "Below are the calculated descriptive statistics for each question.\n\n"
+        "Statistical abbreviations:\n"
+        "- N = number of respondents\n"
+        "- AS = arithmetic mean\n"
+        "- SD = standard deviation\n"
+        "- Median = median value\n"
+        "- Ske = skewness\n"
+        "- Kur = kurtosis\n"
+        "- Max D = Kolmogorov-Smirnov statistic\n"
+        "- K-S p = Kolmogorov-Smirnov p-value\n\n"
+    )
+    _PROMPT_SUFFIX = (
+        "\nProvide a SHORT and CLEAR interpretation (max 5-6 sentences). "
+        "Highlight which questions scored highest/lowest, whether responses "
+        "are normally distributed, and any notable patterns. "
+        "Format your response as HTML using Tailwind CSS utility classes for styling. "
+        "Use elements like <h6 class='font-bold mb-2'>, <p>, <ul class='list-disc pl-5'>, <li>, <strong>, "
+        "<span class='inline-block px-2 py-0.5 rounded text-xs font-bold bg-green-100 text-green-800'>, "
+        "<span class='text-red-600'>, etc. to make it visually clear. "
+        "Do NOT wrap the response in ```html code blocks. Return raw HTML only. "
+        "Answer in the SAME LANGUAGE as the question text."
+    )
+
     def interpret_results(
         self,
         overall_stats: List[Dict[str, Any]],
@@ -56,6 +92,8 @@ class GeminiAIService:
         Returns:
             AI-generated interpretation text.
         """
+        from google.genai import types
+
         prompt = self._build_prompt(overall_stats, grouped_stats, groupings_info)
 
         models_to_try = [self.model] + [
@@ -93,37 +131,19 @@ class GeminiAIService:
         groupings_info: Optional[Dict],
     ) -> str:
         """Build a concise prompt for the AI model."""
-        stats_json = json.dumps(overall_stats, ensure_ascii=False, indent=2)
-
-        prompt = (
-            "You are a statistics expert. A user conducted a Likert-scale (1-5) survey. "
-            "Below are the calculated descriptive statistics for each question.\n\n"
-            "Statistical abbreviations:\n"
-            "- N = number of respondents\n"
-            "- AS = arithmetic mean\n"
-            "- SD = standard deviation\n"
-            "- Median = median value\n"
-            "- Ske = skewness\n"
-            "- Kur = kurtosis\n"
-            "- Max D = Kolmogorov-Smirnov statistic\n"
-            "- K-S p = Kolmogorov-Smirnov p-value\n\n"
-            f"Overall statistics:\n{stats_json}\n"
-        )
+        parts = [
+            self._PROMPT_PREFIX,
+            "Overall statistics:\n",
+            orjson.dumps(overall_stats).decode(),
+            "\n",
+        ]
 
         if grouped_stats and groupings_info:
-            grouped_json = json.dumps(grouped_stats, ensure_ascii=False, indent=2)
-            prompt += f"\nGrouped statistics by demographics:\n{grouped_json}\n"
-
-        prompt += (
-            "\nProvide a SHORT and CLEAR interpretation (max 5-6 sentences). "
-            "Highlight which questions scored highest/lowest, whether responses "
-            "are normally distributed, and any notable patterns. "
-            "Format your response as HTML using Tailwind CSS utility classes for styling. "
-            "Use elements like <h6 class='font-bold mb-2'>, <p>, <ul class='list-disc pl-5'>, <li>, <strong>, "
-            "<span class='inline-block px-2 py-0.5 rounded text-xs font-bold bg-green-100 text-green-800'>, "
-            "<span class='text-red-600'>, etc. to make it visually clear. "
-            "Do NOT wrap the response in ```html code blocks. Return raw HTML only. "
-            "Answer in the SAME LANGUAGE as the question text."
-        )
-
-        return prompt
+            parts += [
+                "\nGrouped statistics by demographics:\n",
+                orjson.dumps(grouped_stats).decode(),
+                "\n",
+            ]
+
+        parts.append(self._PROMPT_SUFFIX)
+        return "".join(parts)
@@ -2,11 +2,14 @@
 Statistical calculations service.
 """
 
-from typing import Optional, Dict, Any
-import warnings
+from typing import Optional, Dict, Any, List, Tuple
 
 import numpy as np
-from scipy import stats
+
+# Possible answers on a 1-5 Likert scale
+LIKERT_VALUES = np.arange(1, 6, dtype=np.float64)
+# Histogram bins for whole-number answers
+LIKERT_BIN_COUNT = 6  # bin 0 unused
 
 
 class StatisticsCalculator:
@@ -25,45 +28,105 @@ class StatisticsCalculator:
         Returns:
             Dictionary containing statistical measures, or None if no valid data.
         """
-        # Filter only valid 1-5 values
-        valid_data = data[(data >= 1) & (data <= 5)].dropna()
+        # Filter only valid 1-5 values (NaN fails both comparisons)
+        values = np.asarray(data, dtype=np.float64)
+        valid_data = values[(values >= 1) & (values <= 5)]
 
         if len(valid_data) == 0:
             return None
 
-        n = len(valid_data)
-        mean = np.mean(valid_data)
-        std = np.std(valid_data, ddof=1)  # Sample standard deviation
-        median = np.median(valid_data)
+        # Likert data has only a handful of distinct values, so every
+        # statistic is computed from (value, count) pairs
+        support, counts = StatisticsCalculator._histogram(valid_data)
+        return StatisticsCalculator._summarize(support, counts)
+
+    @staticmethod
+    def calculate_columns(data) -> List[Optional[Dict[str, Any]]]:
+        """
+        Calculate statistics for every column of a table of 1-5 scale responses.
+
+        Whole-number answers of all columns are counted with a single
+        bincount over the (rows, questions) array instead of one pass
+        per column.
+
+        Args:
+            data: Pandas DataFrame or 2-D array-like with one column per question.
+
+        Returns:
+            List with the statistics dictionary (or None) for each column.
+        """
+        values = np.asarray(data, dtype=np.float64)
+        valid = (values >= 1) & (values <= 5)
+        as_int = np.where(valid, values, 0).astype(np.int64)
+
+        if not np.array_equal(as_int[valid], values[valid]):
+            return [
+                StatisticsCalculator.calculate(values[:, i])
+                for i in range(values.shape[1])
+            ]
+
+        # Shift each column into its own block of 6 bins; bin 0 of every
+        # block collects the invalid answers and is dropped
+        n_columns = values.shape[1]
+        offsets = np.arange(n_columns) * LIKERT_BIN_COUNT
+        counts = np.bincount(
+            (as_int + offsets).ravel(), minlength=n_columns * LIKERT_BIN_COUNT
+        ).reshape(n_columns, LIKERT_BIN_COUNT)[:, 1:]
+
+        return [
+            (
+                StatisticsCalculator._summarize(LIKERT_VALUES, column_counts)
+                if column_counts.any()
+                else None
+            )
+            for column_counts in counts
+        ]
+
+    @staticmethod
+    def _summarize(support: np.ndarray, counts: np.ndarray) -> Dict[str, Any]:
+        """
+        Calculate the statistics of a non-empty histogram of responses.
 
-        # Skewness and Kurtosis - handle low variance cases
+        Args:
+            support: Sorted distinct response values.
+            counts: Number of responses for each value.
+
+        Returns:
+            Dictionary containing statistical measures.
+        """
+        n = int(counts.sum())
+        mean = (support * counts).sum() / n
+        median = StatisticsCalculator._histogram_median(support, counts, n)
+
+        # Central moments of the distribution
+        deviations = support - mean
+        squared = deviations * deviations
+        m2 = (counts * squared).sum() / n
+        std = np.sqrt(m2 * n / (n - 1)) if n > 1 else np.nan  # Sample std
+
+        # Skewness and Kurtosis (biased estimators, as scipy.stats defaults)
+        # - handle low variance cases
         skewness = np.nan
         kurtosis = np.nan
 
         if n >= 3 and std > 1e-10:
-            with warnings.catch_warnings():
-                warnings.simplefilter("ignore", RuntimeWarning)
-                skewness = stats.skew(valid_data)
-                if not np.isfinite(skewness):
-                    skewness = np.nan
+            skewness = (counts * squared * deviations).sum() / n / m2**1.5
 
         if n >= 4 and std > 1e-10:
-            with warnings.catch_warnings():
-                warnings.simplefilter("ignore", RuntimeWarning)
-                kurtosis = stats.kurtosis(valid_data)
-                if not np.isfinite(kurtosis):
-                    kurtosis = np.nan
+            kurtosis = (counts * squared * squared).sum() / n / m2**2 - 3.0
 
         # Kolmogorov-Smirnov test for normality
         ks_statistic, ks_pvalue = np.nan, np.nan
         if n >= 5 and std > 1e-10:
-            with warnings.catch_warnings():
-                warnings.simplefilter("ignore", RuntimeWarning)
-                ks_statistic, ks_pvalue = stats.kstest(
-                    valid_data, "norm", args=(mean, std)
-                )
-                if not np.isfinite(ks_statistic):
-                    ks_statistic, ks_pvalue = np.nan, np.nan
+            from scipy import stats
+
+            ks_statistic = StatisticsCalculator._ks_statistic(
+                support, counts, n, mean, std
+            )
+            # Exact two-sided p-value, as stats.kstest uses by default
+            ks_pvalue = np.clip(stats.kstwo.sf(ks_statistic, n), 0.0, 1.0)
+            if not np.isfinite(ks_statistic):
+                ks_statistic, ks_pvalue = np.nan, np.nan
 
         return {
             "N": n,
@@ -77,27 +140,52 @@ class StatisticsCalculator:
         }
 
     @staticmethod
-    def is_likert_column(series) -> bool:
+    def _histogram(valid_data: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
         """
-        Check if a column contains 1-5 scale responses.
+        Count occurrences of each distinct value.
+
+        Whole-number answers (the usual case) are counted with a single
+        5-bin bincount; other values fall back to np.unique.
 
         Args:
-            series: Pandas Series to check.
+            valid_data: Array of responses between 1 and 5.
 
         Returns:
-            True if the series contains only values between 1 and 5.
+            Tuple of (sorted distinct values, their counts).
         """
-        try:
-            import pandas as pd
+        as_int = valid_data.astype(np.int64)
+        if np.array_equal(as_int, valid_data):
+            return LIKERT_VALUES, np.bincount(as_int, minlength=LIKERT_BIN_COUNT)[1:]
+        return np.unique(valid_data, return_counts=True)
 
-            numeric_series = pd.to_numeric(series, errors="coerce")
-            valid_values = numeric_series.dropna()
+    @staticmethod
+    def _histogram_median(support: np.ndarray, counts: np.ndarray, n: int) -> float:
+        """
+        Median from a histogram: the middle value for odd n, the average
+        of the two middle values for even n (same as np.median).
+        """
+        cumulative = np.cumsum(counts)
+        lower = support[np.searchsorted(cumulative, (n - 1) // 2, side="right")]
+        upper = support[np.searchsorted(cumulative, n // 2, side="right")]
+        return (lower + upper) / 2
 
-            if len(valid_values) == 0:
-                return False
+    @staticmethod
+    def _ks_statistic(
+        support: np.ndarray, counts: np.ndarray, n: int, mean: float, std: float
+    ) -> float:
+        """
+        Kolmogorov-Smirnov D statistic against a normal distribution,
+        computed from a histogram.
 
-            # Check if all values are between 1 and 5
-            unique_values = valid_values.unique()
-            return all(1 <= v <= 5 for v in unique_values) and len(unique_values) <= 5
-        except Exception:
-            return False
+        The empirical CDF only jumps at the observed values, so the normal
+        CDF is evaluated at those (at most 5) points instead of at every
+        sorted sample as stats.kstest does.
+        """
+        from scipy import special
+
+        observed = counts > 0
+        support, counts = support[observed], counts[observed]
+        normal_cdf = special.ndtr((support - mean) / std)
+        upper = np.cumsum(counts)
+        lower = upper - counts
+        return max((upper / n - normal_cdf).max(), (normal_cdf - lower / n).max())
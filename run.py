@@ -16,4 +16,9 @@ else:
 app = create_app(config_class)
 
 if __name__ == '__main__':
+    if not app.debug:
+        app.logger.warning(
+            'Running the Flask development server without debug mode; '
+            'use Gunicorn for production (see README).'
+        )
     app.run()